@@ -10,16 +10,27 @@ to TimescaleDB hypertables, with support for:
 - Cross-database migration
 - Data quality validation
 
+The target session runs with synchronous_commit = off to avoid a WAL flush
+on every commit. Commits recorded in the checkpoint file are flushed with
+SET LOCAL synchronous_commit = on, so the checkpoint never claims batches a
+server crash could lose. After any interruption, re-run the same command
+with --resume. A validation mismatch fails the run and keeps the checkpoint.
+
 Author: Miller-Eads Automation
 Version: 1.3.0
 Last Updated: 2025-12-08
 """
 
 import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import psycopg2
 from psycopg2 import sql
+from psycopg2.extras import execute_values
 from datetime import datetime, timedelta
+import os
 import sys
+import threading
 import time
 import logging
 
@@ -38,12 +49,19 @@ logger = logging.getLogger(__name__)
 class HistorianMigration:
     """Migrate Ignition historian data to TimescaleDB"""
     
-    def __init__(self, source_config, target_config, batch_size=100000):
+    def __init__(self, source_config, target_config, batch_size=100000, use_copy=True,
+                 workers=1, checkpoint_file=None, commit_every=16):
         self.source_config = source_config
         self.target_config = target_config
         self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.workers = workers
+        self.checkpoint_file = checkpoint_file
+        self.commit_every = commit_every
+        self.page_size = min(batch_size, 10000)
         self.source_conn = None
         self.target_conn = None
+        self._checkpoint = {}
         
     def connect(self):
         """Establish database connections"""
@@ -56,170 +74,653 @@ class HistorianMigration:
         else:
             self.target_conn = self.source_conn
             logger.info("Using same database for source and target")
+        
+        self._tune_target_session()
     
-    def analyze_source_data(self):
+    def _tune_target_session(self):
+        """Relax durability and raise memory limits for the bulk load session"""
+        with self.target_conn.cursor() as cur:
+            cur.execute("SET synchronous_commit = off")
+            cur.execute("SET maintenance_work_mem = '1GB'")
+            cur.execute("SET work_mem = '256MB'")
+        self.target_conn.commit()
+    
+    def analyze_source_data(self, source_table='sqlth_1_data'):
         """Analyze source data before migration"""
-        logger.info("Analyzing source data...")
+        logger.info(f"Analyzing source data in {source_table}...")
         
         with self.source_conn.cursor() as cur:
             # Get table statistics
-            cur.execute("""
+            cur.execute(sql.SQL("""
                 SELECT 
                     COUNT(*) as total_records,
                     COUNT(DISTINCT tagid) as unique_tags,
                     MIN(t_stamp) as earliest,
                     MAX(t_stamp) as latest,
-                    pg_size_pretty(pg_total_relation_size('sqlth_1_data')) as size
-                FROM sqlth_1_data;
-            """)
-            stats = cur.fetchone()
+                    pg_size_pretty(pg_total_relation_size(%s)) as size,
+                    {},
+                    {}
+                FROM {};
+            """).format(
+                _utc_label(sql.SQL("MIN(t_stamp)")),
+                _utc_label(sql.SQL("MAX(t_stamp)")),
+                sql.Identifier(source_table)
+            ), (source_table,))
+            *stats, earliest, latest = cur.fetchone()
             
             logger.info(f"Total records: {stats[0]:,}")
             logger.info(f"Unique tags: {stats[1]:,}")
-            logger.info(f"Date range: {datetime.fromtimestamp(stats[2]/1000)} to {datetime.fromtimestamp(stats[3]/1000)}")
+            logger.info(f"Date range: {earliest} to {latest}")
             logger.info(f"Table size: {stats[4]}")
             
-            return stats
+            return tuple(stats)
     
-    def create_backup(self, table_name='sqlth_1_data'):
-        """Create backup table before migration"""
-        backup_name = f"{table_name}_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    def create_backup(self, table_name='sqlth_1_data', heavy=False):
+        """Create backup table before migration
+        
+        By default the original table is renamed to the backup name and an
+        empty copy of its definition (LIKE ... INCLUDING ALL) takes its place
+        as the migration target. This is metadata-only, so it completes in
+        constant time regardless of table size. Views and continuous
+        aggregates stay attached to the renamed backup.
         
-        logger.info(f"Creating backup table: {backup_name}")
+        With heavy=True the table is physically copied instead (CREATE TABLE
+        AS SELECT), leaving the original in place.
+        
+        A rename is refused when the table is empty or a <table>_backup_*
+        table already exists, since both usually mean an earlier run already
+        moved the rows out; migrate from that backup with --source-table.
+        """
+        backup_name = f"{table_name}_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
         with self.target_conn.cursor() as cur:
-            cur.execute(sql.SQL(
-                "CREATE TABLE {} AS SELECT * FROM {}"
-            ).format(
-                sql.Identifier(backup_name),
-                sql.Identifier(table_name)
-            ))
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (table_name,))
+            if not cur.fetchone()[0]:
+                logger.info(f"Table {table_name} does not exist, skipping backup")
+                return None
+            
+            if not heavy:
+                self._check_rename_backup(cur, table_name)
+            
+            if heavy:
+                logger.info(f"Creating backup table: {backup_name}")
+                cur.execute(sql.SQL(
+                    "CREATE TABLE {} AS SELECT * FROM {}"
+                ).format(
+                    sql.Identifier(backup_name),
+                    sql.Identifier(table_name)
+                ))
+            else:
+                logger.info(f"Renaming {table_name} to backup table: {backup_name}")
+                cur.execute(sql.SQL("""
+                    ALTER TABLE {} RENAME TO {};
+                    CREATE TABLE {} (LIKE {} INCLUDING ALL);
+                """).format(
+                    sql.Identifier(table_name),
+                    sql.Identifier(backup_name),
+                    sql.Identifier(table_name),
+                    sql.Identifier(backup_name)
+                ))
             self.target_conn.commit()
             
         logger.info(f"✓ Backup created: {backup_name}")
         return backup_name
     
-    def migrate_batch(self, start_ts, end_ts, source_table='sqlth_1_data', 
-                     target_table='sqlth_1_data'):
-        """Migrate a batch of records"""
+    def _check_rename_backup(self, cur, table_name):
+        """Raise if renaming table_name could hide rows moved out by an earlier run"""
+        cur.execute("""
+            SELECT relname
+            FROM pg_class
+            WHERE relkind IN ('r', 'p')
+              AND relname LIKE %s
+              AND pg_table_is_visible(oid)
+            ORDER BY relname;
+        """, (table_name.replace('_', '\\_') + '\\_backup\\_%',))
+        backups = [row[0] for row in cur.fetchall()]
+        if backups:
+            raise RuntimeError(
+                f"Backup table(s) already exist for {table_name}: {', '.join(backups)}. "
+                f"Migrate from the backup with --source-table {backups[-1]} --no-backup, "
+                f"or drop old backups first"
+            )
         
-        with self.source_conn.cursor() as src_cur, \
-             self.target_conn.cursor() as tgt_cur:
+        cur.execute(sql.SQL("SELECT EXISTS (SELECT 1 FROM {});").format(
+            sql.Identifier(table_name)))
+        if not cur.fetchone()[0]:
+            raise RuntimeError(
+                f"{table_name} is empty, refusing to rename it as a backup. "
+                f"Pass the table holding the data with --source-table and use --no-backup"
+            )
+    
+    def prepare_target_hypertable(self, target_table='sqlth_1_data', chunk_ms=604800000):
+        """Convert the target to a hypertable and configure compression before loading
+        
+        Creating the hypertable up front with large chunks avoids chunk-creation
+        pauses during the bulk load. Compression is only configured here; chunks
+        are compressed after migration by policy or manually. The target stays
+        logged: TimescaleDB does not allow UNLOGGED hypertables.
+        """
+        logger.info(f"Preparing hypertable {target_table} ({chunk_ms} ms chunks)...")
+        
+        with self.target_conn.cursor() as cur:
+            cur.execute("""
+                SELECT create_hypertable(
+                    %s,
+                    't_stamp',
+                    chunk_time_interval => %s,
+                    if_not_exists => TRUE,
+                    migrate_data => TRUE
+                );
+            """, (target_table, chunk_ms))
             
-            # Read batch
-            src_cur.execute("""
-                SELECT tagid, intvalue, floatvalue, stringvalue, 
+            cur.execute("""
+                SELECT compression_enabled
+                FROM timescaledb_information.hypertables
+                WHERE hypertable_name = %s;
+            """, (target_table,))
+            compression_enabled = cur.fetchone()[0]
+            
+            if not compression_enabled:
+                cur.execute(sql.SQL("""
+                    ALTER TABLE {} SET (
+                        timescaledb.compress,
+                        timescaledb.compress_orderby = 't_stamp DESC',
+                        timescaledb.compress_segmentby = 'tagid'
+                    );
+                """).format(sql.Identifier(target_table)))
+            self.target_conn.commit()
+        
+        logger.info(f"✓ Hypertable ready: {target_table}")
+    
+    def _snapshot_indexes(self, table):
+        """Return (schema, name, definition) for indexes that can be rebuilt after the load
+        
+        Primary key and unique indexes are kept since ON CONFLICT depends on them.
+        """
+        with self.target_conn.cursor() as cur:
+            cur.execute("""
+                SELECT n.nspname, i.relname, pg_get_indexdef(x.indexrelid)
+                FROM pg_index x
+                JOIN pg_class i ON i.oid = x.indexrelid
+                JOIN pg_namespace n ON n.oid = i.relnamespace
+                WHERE x.indrelid = to_regclass(%s)
+                  AND NOT x.indisprimary
+                  AND NOT x.indisunique
+                  AND NOT EXISTS (
+                      SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid
+                  );
+            """, (table,))
+            return cur.fetchall()
+    
+    def _drop_indexes(self, index_defs):
+        """Drop indexes so the load does not maintain them row by row
+        
+        The definitions are written to the checkpoint first, so the next run
+        can rebuild them even if this process is killed before it does.
+        """
+        self._save_checkpoint(index_defs=[list(index_def) for index_def in index_defs])
+        
+        with self.target_conn.cursor() as cur:
+            for schema, name, definition in index_defs:
+                logger.info(f"Dropping index {name}: {definition}")
+                cur.execute(sql.SQL("DROP INDEX IF EXISTS {};").format(
+                    sql.Identifier(schema, name)))
+        self.target_conn.commit()
+        
+        return index_defs
+    
+    def _recreate_indexes(self, index_defs):
+        """Rebuild dropped indexes in parallel, one connection per index"""
+        
+        def build(index_def):
+            schema, name, definition = index_def
+            start_time = time.time()
+            conn = psycopg2.connect(**self.target_config)
+            try:
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute("SET maintenance_work_mem = '1GB'")
+                    cur.execute("SET max_parallel_maintenance_workers = 8")
+                    # Idempotent, a resumed run may find some already rebuilt
+                    cur.execute(definition.replace('CREATE INDEX ', 'CREATE INDEX IF NOT EXISTS ', 1))
+            finally:
+                conn.close()
+            logger.info(f"✓ Index rebuilt: {name} in {time.time() - start_time:.2f}s")
+        
+        logger.info(f"Rebuilding {len(index_defs)} indexes...")
+        with ThreadPoolExecutor(max_workers=len(index_defs)) as pool:
+            for future in [pool.submit(build, index_def) for index_def in index_defs]:
+                future.result()
+    
+    def migrate_batch(self, start_ts, end_ts, source_table='sqlth_1_data', 
+                     target_table='sqlth_1_data', on_conflict=True):
+        """Migrate a batch of records
+        
+        The batch is left uncommitted so callers can group several batches
+        per transaction. on_conflict=False drops ON CONFLICT DO NOTHING, which
+        is only safe when the target holds no rows in the batch range.
+        """
+        
+        batch = (start_ts, end_ts, source_table, target_table, on_conflict)
+        if self.source_conn is self.target_conn:
+            migrated = self._insert_select_batch(*batch)
+        elif self.use_copy:
+            migrated = self._copy_batch(*batch)
+        else:
+            migrated = self._insert_values_batch(*batch)
+        
+        return migrated
+    
+    def _insert_select_batch(self, start_ts, end_ts, source_table, target_table, on_conflict):
+        """Same database: copy server-side, rows never leave PostgreSQL"""
+        with self.target_conn.cursor() as tgt_cur:
+            tgt_cur.execute(sql.SQL("""
+                INSERT INTO {}
+                (tagid, intvalue, floatvalue, stringvalue, datevalue, dataintegrity, t_stamp)
+                SELECT tagid, intvalue, floatvalue, stringvalue,
                        datevalue, dataintegrity, t_stamp
                 FROM {}
                 WHERE t_stamp >= %s AND t_stamp < %s
-                ORDER BY t_stamp;
-            """.format(source_table), (start_ts, end_ts))
+                {};
+            """).format(
+                sql.Identifier(target_table),
+                sql.Identifier(source_table),
+                _conflict_clause(on_conflict)
+            ), (start_ts, end_ts))
+            
+            return tgt_cur.rowcount
+    
+    def _copy_batch(self, start_ts, end_ts, source_table, target_table, on_conflict):
+        """Cross database: stream the batch as binary COPY"""
+        with self.source_conn.cursor() as src_cur, \
+             self.target_conn.cursor() as tgt_cur:
+            
+            # Stage rows in a temp table so ON CONFLICT still applies,
+            # otherwise COPY straight into the target
+            if on_conflict:
+                tgt_cur.execute(sql.SQL("""
+                    CREATE TEMP TABLE IF NOT EXISTS migration_staging
+                    (LIKE {} INCLUDING DEFAULTS);
+                    TRUNCATE migration_staging;
+                """).format(sql.Identifier(target_table)))
+                copy_table = sql.Identifier('migration_staging')
+            else:
+                copy_table = sql.Identifier(target_table)
+            
+            # Source COPY output is piped straight into the target COPY input;
+            # rows stay in PostgreSQL binary format and are never buffered whole
+            read_fd, write_fd = os.pipe()
+            errors = []
+            
+            def copy_out():
+                try:
+                    with os.fdopen(write_fd, 'wb') as writer:
+                        src_cur.copy_expert(sql.SQL("""
+                            COPY (
+                                SELECT tagid, intvalue, floatvalue, stringvalue,
+                                       datevalue, dataintegrity, t_stamp
+                                FROM {}
+                                WHERE t_stamp >= {} AND t_stamp < {}
+                            ) TO STDOUT WITH (FORMAT BINARY)
+                        """).format(
+                            sql.Identifier(source_table),
+                            sql.Literal(start_ts),
+                            sql.Literal(end_ts)
+                        ), writer)
+                except Exception as e:
+                    errors.append(e)
             
-            records = src_cur.fetchall()
+            producer = threading.Thread(target=copy_out, daemon=True)
+            producer.start()
+            try:
+                with os.fdopen(read_fd, 'rb') as reader:
+                    tgt_cur.copy_expert(sql.SQL("""
+                        COPY {}
+                        (tagid, intvalue, floatvalue, stringvalue, datevalue, dataintegrity, t_stamp)
+                        FROM STDIN WITH (FORMAT BINARY)
+                    """).format(copy_table), reader)
+            except Exception as target_error:
+                # Closing the reader unblocks the producer if the target failed
+                producer.join()
+                # A failed source truncates the stream, so the target error is
+                # only a symptom; a broken pipe means the target failed first
+                if errors and not isinstance(errors[0], BrokenPipeError):
+                    raise errors[0] from target_error
+                raise
             
-            if not records:
-                return 0
+            producer.join()
+            if errors:
+                raise errors[0]
             
-            # Insert batch
-            insert_query = """
-                INSERT INTO {} 
+            if not on_conflict:
+                return tgt_cur.rowcount
+            
+            tgt_cur.execute(sql.SQL("""
+                INSERT INTO {}
                 (tagid, intvalue, floatvalue, stringvalue, datevalue, dataintegrity, t_stamp)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                SELECT tagid, intvalue, floatvalue, stringvalue,
+                       datevalue, dataintegrity, t_stamp
+                FROM migration_staging
                 ON CONFLICT DO NOTHING;
-            """.format(target_table)
+            """).format(sql.Identifier(target_table)))
             
-            tgt_cur.executemany(insert_query, records)
-            self.target_conn.commit()
+            return tgt_cur.rowcount
+    
+    def _insert_values_batch(self, start_ts, end_ts, source_table, target_table, on_conflict):
+        """Cross database without COPY: multi-row INSERT pages"""
+        insert_query = sql.SQL("""
+            INSERT INTO {} 
+            (tagid, intvalue, floatvalue, stringvalue, datevalue, dataintegrity, t_stamp)
+            VALUES %s
+            {};
+        """).format(sql.Identifier(target_table), _conflict_clause(on_conflict))
+        
+        # Named cursor streams rows from the server instead of buffering the batch
+        with self.source_conn.cursor(name=f"mig_{start_ts}") as src_cur, \
+             self.target_conn.cursor() as tgt_cur:
+            
+            src_cur.execute(sql.SQL("""
+                SELECT tagid, intvalue, floatvalue, stringvalue, 
+                       datevalue, dataintegrity, t_stamp
+                FROM {}
+                WHERE t_stamp >= %s AND t_stamp < %s;
+            """).format(sql.Identifier(source_table)), (start_ts, end_ts))
             
-            return len(records)
+            migrated = 0
+            while True:
+                records = src_cur.fetchmany(self.page_size)
+                if not records:
+                    break
+                
+                execute_values(tgt_cur, insert_query, records, page_size=self.page_size)
+                migrated += len(records)
+            
+            return migrated
     
-    def migrate_all(self, source_table='sqlth_1_data', target_table='sqlth_1_data'):
-        """Migrate all data in batches"""
+    def migrate_all(self, source_table='sqlth_1_data', target_table='sqlth_1_data',
+                    resume_ts=None):
+        """Migrate all data in batches
+        
+        Progress is checkpointed after every commit. Passing the
+        checkpoint's completed_ts as resume_ts skips everything below it.
+        """
         
         logger.info("Starting batch migration...")
         
-        with self.source_conn.cursor() as cur:
-            # Get time range
-            cur.execute(f"""
-                SELECT MIN(t_stamp), MAX(t_stamp) 
-                FROM {source_table};
-            """)
-            min_ts, max_ts = cur.fetchone()
+        # The day histogram also gives the time range, no separate scan needed
+        ranges = self._batch_ranges(source_table)
         
+        if not ranges:
+            logger.info("No source data to migrate")
+            return 0
+        
+        min_ts, max_ts = ranges[0][0], ranges[-1][1]
+        total_batches = len(ranges)
         logger.info(f"Time range: {min_ts} to {max_ts}")
         
-        # Calculate batch intervals (1 day batches)
-        batch_interval = 86400000  # 24 hours in milliseconds
-        current_ts = min_ts
+        # Immutable plan: (batch_num, start, end, label), clipped to the resume point
+        plan = [
+            (batch_num, max(start_ts, resume_ts or start_ts), end_ts, label)
+            for batch_num, (start_ts, end_ts, label) in enumerate(ranges, 1)
+            if resume_ts is None or end_ts > resume_ts
+        ]
+        if resume_ts is not None:
+            logger.info(f"Resuming from t_stamp {resume_ts}: "
+                        f"{total_batches - len(plan):,} batches already complete")
+        logger.info(f"Planned {len(plan):,} batches across {self.workers} worker(s)")
+        
+        # Planned ranges are disjoint, so conflicts can only come from rows
+        # already in the target; one probe over the whole span decides
+        on_conflict = self._target_has_rows(target_table, min_ts, max_ts)
+        if not on_conflict:
+            logger.info("Target range is empty, loading without ON CONFLICT")
+        
         total_migrated = 0
-        batch_num = 0
         
-        while current_ts < max_ts:
-            batch_num += 1
-            end_ts = min(current_ts + batch_interval, max_ts)
-            
-            start_time = time.time()
-            migrated = self.migrate_batch(current_ts, end_ts, source_table, target_table)
-            duration = time.time() - start_time
-            
-            total_migrated += migrated
-            
-            if migrated > 0:
-                logger.info(f"Batch {batch_num}: Migrated {migrated:,} records "
-                          f"({datetime.fromtimestamp(current_ts/1000).date()}) "
-                          f"in {duration:.2f}s")
-            
-            current_ts = end_ts
+        if self.workers > 1:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.source_config, self.target_config,
+                          self.batch_size, self.use_copy)
+            ) as pool:
+                futures = {
+                    pool.submit(_migrate_range, start_ts, end_ts,
+                                source_table, target_table, on_conflict): i
+                    for i, (_, start_ts, end_ts, _) in enumerate(plan)
+                }
+                
+                # Batches finish out of order; checkpoint the contiguous prefix
+                done = set()
+                next_i = 0
+                try:
+                    for future in as_completed(futures):
+                        i = futures[future]
+                        batch_num, _, _, label = plan[i]
+                        migrated, duration = future.result()
+                        total_migrated += migrated
+                        self._log_batch(batch_num, total_batches, label, migrated, duration)
+                        
+                        done.add(i)
+                        if next_i in done:
+                            while next_i in done:
+                                next_i += 1
+                            self._save_checkpoint(source_table=source_table,
+                                                  target_table=target_table,
+                                                  batch=plan[next_i - 1][0],
+                                                  completed_ts=plan[next_i - 1][2])
+                except BaseException:
+                    # Stop queued batches instead of loading the rest of the plan
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    raise
+        else:
+            # Commit every commit_every batches; the checkpoint only ever
+            # records durably committed batches, so a failure rolls back to it
+            batches_since_commit = 0
+            try:
+                for batch_num, start_ts, end_ts, label in plan:
+                    start_time = time.time()
+                    migrated = self.migrate_batch(start_ts, end_ts, source_table, target_table,
+                                                  on_conflict)
+                    duration = time.time() - start_time
+                    
+                    total_migrated += migrated
+                    self._log_batch(batch_num, total_batches, label, migrated, duration)
+                    
+                    batches_since_commit += 1
+                    if batches_since_commit >= self.commit_every:
+                        _durable_commit(self.target_conn)
+                        self._save_checkpoint(source_table=source_table,
+                                              target_table=target_table,
+                                              batch=batch_num, completed_ts=end_ts)
+                        batches_since_commit = 0
+                
+                _durable_commit(self.target_conn)
+            except Exception:
+                self.target_conn.rollback()
+                raise
         
         logger.info(f"✓ Migration complete: {total_migrated:,} total records migrated")
         return total_migrated
     
-    def validate_migration(self, source_table='sqlth_1_data', target_table='sqlth_1_data'):
-        """Validate migration completed successfully"""
+    def _target_has_rows(self, target_table, start_ts, end_ts):
+        """Check whether the target already holds rows in [start_ts, end_ts)"""
+        with self.target_conn.cursor() as cur:
+            cur.execute(sql.SQL("""
+                SELECT EXISTS (
+                    SELECT 1 FROM {} WHERE t_stamp >= %s AND t_stamp < %s
+                );
+            """).format(sql.Identifier(target_table)), (start_ts, end_ts))
+            has_rows = cur.fetchone()[0]
+        self.target_conn.commit()
         
-        logger.info("Validating migration...")
+        return has_rows
+    
+    def load_checkpoint(self):
+        """Return the saved checkpoint dict, or None if there is none"""
+        if not self.checkpoint_file or not os.path.exists(self.checkpoint_file):
+            return None
         
-        with self.source_conn.cursor() as src_cur, \
-             self.target_conn.cursor() as tgt_cur:
-            
-            # Compare record counts
-            src_cur.execute(f"SELECT COUNT(*) FROM {source_table};")
-            source_count = src_cur.fetchone()[0]
-            
-            tgt_cur.execute(f"SELECT COUNT(*) FROM {target_table};")
-            target_count = tgt_cur.fetchone()[0]
-            
-            logger.info(f"Source records: {source_count:,}")
-            logger.info(f"Target records: {target_count:,}")
-            
-            if source_count == target_count:
-                logger.info("✓ Record counts match")
-            else:
-                logger.warning(f"⚠ Record count mismatch: {source_count - target_count} records difference")
-            
-            # Compare timestamp ranges
-            src_cur.execute(f"SELECT MIN(t_stamp), MAX(t_stamp) FROM {source_table};")
-            src_range = src_cur.fetchone()
-            
-            tgt_cur.execute(f"SELECT MIN(t_stamp), MAX(t_stamp) FROM {target_table};")
-            tgt_range = tgt_cur.fetchone()
-            
-            if src_range == tgt_range:
-                logger.info("✓ Timestamp ranges match")
-            else:
-                logger.warning("⚠ Timestamp range mismatch")
-            
-            # Compare tag distribution
-            src_cur.execute(f"SELECT COUNT(DISTINCT tagid) FROM {source_table};")
-            src_tags = src_cur.fetchone()[0]
-            
-            tgt_cur.execute(f"SELECT COUNT(DISTINCT tagid) FROM {target_table};")
-            tgt_tags = tgt_cur.fetchone()[0]
+        with open(self.checkpoint_file) as f:
+            self._checkpoint = json.load(f)
+        return self._checkpoint
+    
+    def _save_checkpoint(self, **fields):
+        """Merge fields into the checkpoint and write it atomically
+        
+        completed_ts records that every row below it has been committed.
+        """
+        self._checkpoint.update(fields)
+        if not self.checkpoint_file:
+            return
+        
+        tmp_file = f"{self.checkpoint_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self._checkpoint, f)
+        os.replace(tmp_file, self.checkpoint_file)
+    
+    def _clear_checkpoint(self):
+        """Remove the checkpoint once the migration has finished"""
+        self._checkpoint = {}
+        if self.checkpoint_file and os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
+    
+    def _batch_ranges(self, source_table):
+        """Plan [start, end, label) ranges of ~batch_size records over non-empty days
+        
+        A single GROUP BY pass counts rows per day. Consecutive small days are
+        packed into one batch, days larger than batch_size are split on row
+        offsets, and days without data are never visited.
+        """
+        day_ms = 86400000
+        
+        with self.source_conn.cursor() as cur:
+            cur.execute(sql.SQL("""
+                SELECT day_ts, {}, records
+                FROM (
+                    SELECT t_stamp / %s * %s AS day_ts, COUNT(*) AS records
+                    FROM {}
+                    GROUP BY 1
+                ) days
+                ORDER BY 1;
+            """).format(
+                _utc_label(sql.SQL("day_ts")),
+                sql.Identifier(source_table)
+            ), (day_ms, day_ms))
+            days = cur.fetchall()
+        
+        if not days:
+            return []
+        
+        span = (days[-1][0] - days[0][0]) // day_ms + 1
+        logger.info(f"Skipping {span - len(days):,} of {span:,} days with no data "
+                    f"({(span - len(days)) / span:.0%})")
+        
+        ranges = []
+        pending = None  # [start_ts, end_ts, label, records] of days being packed
+        
+        for day_ts, label, records in days:
+            if pending and pending[3] + records > self.batch_size:
+                ranges.append(tuple(pending[:3]))
+                pending = None
             
-            if src_tags == tgt_tags:
-                logger.info(f"✓ Tag counts match ({src_tags} tags)")
+            if records > self.batch_size:
+                current_ts, current_label = day_ts, label
+                while current_ts < day_ts + day_ms:
+                    end_ts, next_label = self._next_batch_end(
+                        current_ts, day_ts + day_ms, source_table)
+                    ranges.append((current_ts, end_ts, current_label))
+                    current_ts, current_label = end_ts, next_label
+            elif pending:
+                pending[1] = day_ts + day_ms
+                pending[3] += records
             else:
-                logger.warning(f"⚠ Tag count mismatch: {src_tags} vs {tgt_tags}")
+                pending = [day_ts, day_ts + day_ms, label, records]
+        
+        if pending:
+            ranges.append(tuple(pending[:3]))
+        
+        return ranges
+    
+    def _log_batch(self, batch_num, total_batches, label, migrated, duration):
+        """Log progress for a completed batch"""
+        if migrated > 0:
+            logger.info(f"Batch {batch_num}/{total_batches}: Migrated {migrated:,} records "
+                      f"({label}) "
+                      f"in {duration:.2f}s")
+    
+    def _next_batch_end(self, start_ts, limit_ts, source_table):
+        """Find the exclusive end (and its log label) of a batch holding ~batch_size records"""
+        with self.source_conn.cursor() as cur:
+            cur.execute(sql.SQL("""
+                SELECT t_stamp, {}
+                FROM {}
+                WHERE t_stamp >= %s AND t_stamp < %s
+                ORDER BY t_stamp
+                OFFSET %s LIMIT 1;
+            """).format(
+                _utc_label(sql.SQL("t_stamp")),
+                sql.Identifier(source_table)
+            ), (start_ts, limit_ts, self.batch_size))
+            row = cur.fetchone()
+        
+        if row is None:
+            return limit_ts, None
+        
+        # Always advance, even when more than batch_size rows share a timestamp
+        return max(row[0], start_ts + 1), row[1]
+    
+    def validate_migration(self, source_table='sqlth_1_data', target_table='sqlth_1_data'):
+        """Validate migration completed successfully, returns True if counts and checksums match"""
+        
+        logger.info("Validating migration...")
+        
+        # bit_xor needs PostgreSQL 14+; both sides must use the same aggregate
+        use_bit_xor = min(self.source_conn.server_version,
+                          self.target_conn.server_version) >= 140000
+        
+        source_count, source_hash = self._fingerprint(self.source_conn, source_table, use_bit_xor)
+        target_count, target_hash = self._fingerprint(self.target_conn, target_table, use_bit_xor)
+        
+        # Compare record counts
+        logger.info(f"Source records: {source_count:,}")
+        logger.info(f"Target records: {target_count:,}")
+        
+        if source_count == target_count:
+            logger.info("✓ Record counts match")
+        else:
+            logger.warning(f"⚠ Record count mismatch: {source_count - target_count} records difference")
+        
+        # Compare row content
+        if source_hash == target_hash:
+            logger.info("✓ Data checksums match")
+        else:
+            logger.warning("⚠ Data checksum mismatch: row contents differ between source and target")
+        
+        return source_count == target_count and source_hash == target_hash
+    
+    def _fingerprint(self, conn, table, use_bit_xor=True):
+        """Return (count, order-independent checksum of all rows) in one scan"""
+        # floatvalue is hashed in binary form: its text output depends on
+        # extra_float_digits, whose default changed in PostgreSQL 12
+        row_text = sql.SQL(
+            "ROW(tagid, intvalue, encode(float8send(floatvalue), 'hex'), stringvalue, "
+            "datevalue, dataintegrity, t_stamp)::text"
+        )
+        
+        if use_bit_xor:
+            checksum = sql.SQL("bit_xor(hashtextextended({}, 0))").format(row_text)
+        else:
+            checksum = sql.SQL(
+                "sum(('x' || substr(md5({}), 1, 16))::bit(64)::bigint)"
+            ).format(row_text)
+        
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL("SELECT COUNT(*), {} FROM {};").format(
+                checksum,
+                sql.Identifier(table)
+            ))
+            return cur.fetchone()
     
     def close(self):
         """Close database connections"""
@@ -229,6 +730,46 @@ class HistorianMigration:
             self.target_conn.close()
 
 
+# Per-process migration instance used by ProcessPoolExecutor workers
+_worker_migration = None
+
+
+def _utc_label(ms_expr):
+    """SQL formatting a millisecond epoch expression as a UTC log label"""
+    return sql.SQL(
+        "to_char(to_timestamp({} / 1000.0) AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS \"UTC\"')"
+    ).format(ms_expr)
+
+
+def _durable_commit(conn):
+    """Commit with a WAL flush despite the session's synchronous_commit = off"""
+    with conn.cursor() as cur:
+        cur.execute("SET LOCAL synchronous_commit = on")
+    conn.commit()
+
+
+def _conflict_clause(on_conflict):
+    """ON CONFLICT DO NOTHING, or nothing when the target range is known to be empty"""
+    return sql.SQL("ON CONFLICT DO NOTHING" if on_conflict else "")
+
+
+def _init_worker(source_config, target_config, batch_size, use_copy):
+    """Open one set of connections per worker process"""
+    global _worker_migration
+    _worker_migration = HistorianMigration(source_config, target_config,
+                                           batch_size, use_copy)
+    _worker_migration.connect()
+
+
+def _migrate_range(start_ts, end_ts, source_table, target_table, on_conflict):
+    """Migrate one batch range in a worker process"""
+    start_time = time.time()
+    migrated = _worker_migration.migrate_batch(start_ts, end_ts, source_table, target_table,
+                                               on_conflict)
+    _durable_commit(_worker_migration.target_conn)
+    return migrated, time.time() - start_time
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Migrate Ignition historian data to TimescaleDB'
@@ -241,8 +782,19 @@ def main():
     parser.add_argument('--source-table', default='sqlth_1_data', help='Source table')
     parser.add_argument('--target-table', default='sqlth_1_data', help='Target table')
     parser.add_argument('--batch-size', type=int, default=100000, help='Batch size')
+    parser.add_argument('--chunk-interval', type=int, default=604800000,
+                        help='Target hypertable chunk interval in milliseconds')
+    parser.add_argument('--workers', type=int, default=1, help='Parallel migration workers')
+    parser.add_argument('--commit-every', type=int, default=16,
+                        help='Batches per transaction (single worker)')
     parser.add_argument('--no-backup', action='store_true', help='Skip backup creation')
+    parser.add_argument('--heavy-backup', action='store_true',
+                        help='Physically copy the table instead of renaming it')
     parser.add_argument('--validate-only', action='store_true', help='Only validate, do not migrate')
+    parser.add_argument('--checkpoint-file', default='migration_checkpoint.json',
+                        help='File recording the last committed batch')
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume an interrupted migration from the checkpoint file')
     
     args = parser.parse_args()
     
@@ -256,29 +808,90 @@ def main():
     }
     
     # Create migration instance
-    migration = HistorianMigration(db_config, db_config, args.batch_size)
+    migration = HistorianMigration(db_config, db_config, args.batch_size,
+                                   workers=args.workers,
+                                   checkpoint_file=args.checkpoint_file,
+                                   commit_every=args.commit_every)
+    
+    index_defs = []
     
     try:
         # Connect
         migration.connect()
         
-        # Analyze
-        migration.analyze_source_data()
-        
         if args.validate_only:
-            migration.validate_migration(args.source_table, args.target_table)
+            migration.analyze_source_data(args.source_table)
+            if not migration.validate_migration(args.source_table, args.target_table):
+                raise RuntimeError("Validation failed")
             return
         
-        # Create backup
-        if not args.no_backup:
-            backup_name = migration.create_backup(args.target_table)
-            logger.info(f"Backup created: {backup_name}")
+        source_table = args.source_table
+        checkpoint = migration.load_checkpoint()
+        
+        if args.resume:
+            # Backup and source selection were done by the interrupted run
+            if not checkpoint:
+                raise RuntimeError(f"--resume given but no checkpoint found at {args.checkpoint_file}")
+            if checkpoint.get('target_table') != args.target_table:
+                raise RuntimeError(f"Checkpoint is for target {checkpoint.get('target_table')}, "
+                                   f"not {args.target_table}")
+            
+            source_table = checkpoint['source_table']
+            logger.info(f"Resuming {source_table} -> {args.target_table} "
+                        f"after batch {checkpoint['batch']}")
+        else:
+            backup_name = None
+            
+            # Fields below overwrite the old checkpoint; index_defs carry over
+            if checkpoint and checkpoint.get('index_defs'):
+                logger.warning(f"{len(checkpoint['index_defs'])} indexes dropped by an earlier run "
+                               f"will be rebuilt")
+            
+            # Create backup
+            if not args.no_backup:
+                backup_name = migration.create_backup(args.target_table, heavy=args.heavy_backup)
+                logger.info(f"Backup created: {backup_name}")
+                
+                # In-place migration: the original rows now live in the backup
+                if (backup_name and not args.heavy_backup
+                        and source_table == args.target_table
+                        and migration.source_conn is migration.target_conn):
+                    source_table = backup_name
+            
+            # Record the selected source (and where the rows went) before
+            # anything else can fail, so --resume always has a checkpoint
+            migration._save_checkpoint(source_table=source_table,
+                                       target_table=args.target_table,
+                                       backup_table=backup_name,
+                                       batch=0, completed_ts=None)
+        
+        # Analyze the selected source, which may be the backup
+        migration.analyze_source_data(source_table)
+        
+        # Prepare hypertable
+        migration.prepare_target_hypertable(args.target_table, args.chunk_interval)
+        
+        # Drop secondary indexes; rebuilt in bulk after validation. Also
+        # rebuilds the ones an interrupted run had already dropped
+        saved_defs = [tuple(index_def) for index_def in (checkpoint or {}).get('index_defs', [])]
+        current_defs = [index_def for index_def in migration._snapshot_indexes(args.target_table)
+                        if index_def not in saved_defs]
+        index_defs = migration._drop_indexes(saved_defs + current_defs)
         
         # Migrate
-        total = migration.migrate_all(args.source_table, args.target_table)
+        total = migration.migrate_all(source_table, args.target_table,
+                                      resume_ts=checkpoint['completed_ts'] if args.resume else None)
+        
+        # Validate; a mismatch keeps the checkpoint and the backup
+        if not migration.validate_migration(source_table, args.target_table):
+            raise RuntimeError("Validation failed, checkpoint and backup kept")
+        
+        # Rebuild indexes
+        if index_defs:
+            migration._recreate_indexes(index_defs)
+            index_defs = []
         
-        # Validate
-        migration.validate_migration(args.source_table, args.target_table)
+        migration._clear_checkpoint()
         
         logger.info("✓ Migration completed successfully")
         
@@ -286,7 +899,17 @@ def main():
         logger.error(f"Migration failed: {str(e)}", exc_info=True)
         sys.exit(1)
     finally:
-        migration.close()
+        try:
+            if index_defs:
+                try:
+                    migration.target_conn.rollback()
+                except psycopg2.Error as e:
+                    # Rebuild on fresh connections even if this one is dead
+                    logger.warning(f"Rollback failed: {e}")
+                migration._recreate_indexes(index_defs)
+                migration._save_checkpoint(index_defs=[])
+        finally:
+            migration.close()
 
 
 if __name__ == '__main__':